@@ -1,94 +1,138 @@
-import random
-from typing import List, Tuple
-from datetime import datetime
-from schedule import Schedule, ScheduleItem, Activity, Room
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+import numpy as np
+from schedule import (Schedule, Population, Activity, Room, ACTIVITY, ROOM, TIME, FACILITATOR, HAVE_NUMBA,
+                      init_fitness_worker, static_score_tables)
+
+ACTIVITIES = [
+    Activity("SLA100A", 50, ["Glen", "Lock", "Banks", "Zeldin"], ["Numen", "Richards"]),
+    Activity("SLA100B", 50, ["Glen", "Lock", "Banks", "Zeldin"], ["Numen", "Richards"]),
+    Activity("SLA191A", 50, ["Glen", "Lock", "Banks", "Zeldin"], ["Numen", "Richards"]),
+    Activity("SLA191B", 50, ["Glen", "Lock", "Banks", "Zeldin"], ["Numen", "Richards"]),
+    Activity("SLA201", 50, ["Glen", "Banks", "Zeldin", "Shaw"], ["Numen", "Richards", "Singer"]),
+    Activity("SLA291", 50, ["Lock", "Banks", "Zeldin", "Singer"], ["Numen", "Richards", "Shaw", "Tyler"]),
+    Activity("SLA303", 60, ["Glen", "Zeldin", "Banks"], ["Numen", "Singer", "Shaw"]),
+    Activity("SLA304", 25, ["Glen", "Banks", "Tyler"], ["Numen", "Singer", "Shaw", "Richards", "Uther", "Zeldin"]),
+    Activity("SLA394", 20, ["Tyler", "Singer"], ["Richards", "Zeldin"]),
+    Activity("SLA449", 60, ["Tyler", "Singer", "Shaw"], ["Zeldin", "Uther"]),
+    Activity("SLA451", 100, ["Tyler", "Singer", "Shaw"], ["Zeldin", "Uther", "Richards", "Banks"])
+]
+
+ROOMS = [
+    Room("Slater 003", 45),
+    Room("Roman 216", 30),
+    Room("Loft 206", 75),
+    Room("Roman 201", 50),
+    Room("Loft 310", 108),
+    Room("Beach 201", 60),
+    Room("Beach 301", 75),
+    Room("Logos 325", 450),
+    Room("Frank 119", 60)
+]
+
+TIMES = ["10 AM", "11 AM", "12 PM", "1 PM", "2 PM", "3 PM"]
+FACILITATORS = ["Lock", "Glen", "Banks", "Richards", "Shaw", "Singer", "Uther", "Tyler", "Numen", "Zeldin"]
+
+"""
+Lookup tables indexed by the integer codes stored in a Schedule.
+A schedule holds, per activity, an index into ROOMS, TIMES and FACILITATORS,
+so fitness evaluation never touches the string names.
+"""
+ROOM_CAP = np.array([room.capacity for room in ROOMS], dtype=np.int16)
+ENROLL = np.array([activity.enrollment for activity in ACTIVITIES], dtype=np.int16)
+PREF_FAC = np.array([[f in a.preferred_facilitators for f in FACILITATORS] for a in ACTIVITIES])
+OTHER_FAC = np.array([[f in a.other_facilitators for f in FACILITATORS] for a in ACTIVITIES])
+SLA101_MASK = np.array([a.name in ["SLA100A", "SLA100B"] for a in ACTIVITIES])
+SLA191_MASK = np.array([a.name in ["SLA191A", "SLA191B"] for a in ACTIVITIES])
+ROOM_IS_ROMAN_OR_BEACH = np.array(["Roman" in room.name or "Beach" in room.name for room in ROOMS])
+FAC_LOAD_EXEMPT = np.array([f == "Tyler" for f in FACILITATORS])
+
+# Room size and facilitator preference scores of every [activity, room] and [activity, facilitator] pair
+SCORE_AR, SCORE_AF = static_score_tables(ROOM_CAP, ENROLL, PREF_FAC, OTHER_FAC)
+
+FITNESS_TABLES = (SCORE_AR, SCORE_AF, SLA101_MASK, SLA191_MASK, ROOM_IS_ROMAN_OR_BEACH, FAC_LOAD_EXEMPT)
 
 """
-Create a random schedule for all activities
+Create initial population of n random schedules
 Args:
-        activities: Dictionary of activities with their details.
-        rooms: Dictionary of available rooms.
+        activities: List of activities with their details.
+        rooms: List of available rooms.
         times: List of available time slots.
         facilitators: List of available facilitators.
+        n: Number of schedules.
+        rng: Random number generator used for all draws.
 
-Returns: a list of scheduled items with randomly assigned room, time, and facilitator for each activity.
-
-"""
-def random_schedule(activities: dict, rooms: dict, times: List[str], facilitators: List[str]) -> List[ScheduleItem]:
-    return [
-        ScheduleItem(
-            activity=activity_name,
-            facilitator=random.choice(facilitators),
-            room=random.choice(list(rooms.keys())),
-            time=random.choice(times)
-        )
-        for activity_name in activities.keys()
-    ]
+Returns: a Population with a randomly assigned room, time, and facilitator index for each activity
+of each schedule, with fitness scores calculated.
 
 """
-Create initial population of n schedules
-Return a list of Schedule objects representing the initial population.
-"""
-def initial_population(activities: dict, rooms: dict, times: List[str], facilitators: List[str], n: int) -> List[Schedule]:
-    population = []
-    for _ in range(n):
-        schedule = Schedule(random_schedule(activities, rooms, times, facilitators))
-        schedule.calculate_fitness(activities, rooms)
-        population.append(schedule)
+def initial_population(activities: List[Activity], rooms: List[Room], times: List[str], facilitators: List[str], n: int,
+                       rng: np.random.Generator) -> Population:
+    shape = (n, len(activities))
+    genes = np.empty(shape + (4,), dtype=np.int8)
+    genes[..., ACTIVITY] = np.arange(len(activities))
+    genes[..., ROOM] = rng.integers(0, len(rooms), size=shape, dtype=np.int8)
+    genes[..., TIME] = rng.integers(0, len(times), size=shape, dtype=np.int8)
+    genes[..., FACILITATOR] = rng.integers(0, len(facilitators), size=shape, dtype=np.int8)
+    population = Population(genes)
+    population.calculate_fitness(*FITNESS_TABLES)
     return population
 
 """
 Select two best schedules as parents
 Args: 
-    generation: The current generation of schedules.
+    generation: The current generation of schedules, with fitness scores calculated.
 
 Returns:
-    Tuple[Schedule, Schedule]: The two schedules with the highest fitness scores.
+    Tuple[Schedule, Schedule]: The two schedules with the highest fitness scores, best first.
 """
-def select_parents(generation: List[Schedule]) -> Tuple[Schedule, Schedule]:
-    # Sort by fitness score
-    sorted_generation = sorted(generation, key=lambda s: s.fitness_score, reverse=True)
-    return sorted_generation[0], sorted_generation[1]
+def select_parents(generation: Population) -> Tuple[Schedule, Schedule]:
+    # Partial sort: only the two highest scores are moved to the front, in order
+    best, second = np.argpartition(-generation.fitness_scores, 1)[:2]
+    return generation[best], generation[second]
 
-def crossover(first: Schedule, second: Schedule) -> Schedule:
-    """Create offspring from two parent schedules"""
-    crossover_point = random.randint(0, len(first.items))
-    child_items = first.items[:crossover_point] + second.items[crossover_point:]
-    return Schedule(child_items)
+def crossover(first: Schedule, second: Schedule, n: int, rng: np.random.Generator) -> Population:
+    """Create n offspring from two parent schedules, each with its own crossover point"""
+    crossover_points = rng.integers(0, len(first), size=n, endpoint=True)
+    # Child i takes the activities before its crossover point from the first parent, the rest from the second
+    from_first = np.arange(len(first)) < crossover_points[:, None]
+    return Population(np.where(from_first[..., None], first.genes, second.genes))
 
 """
-Mutate a given schedule with a specified mutation rate.
-Returns: a new Schedule object representing the mutated schedule.
+Mutate every schedule of a population with a heavy-tailed mutation rate ("fast GA").
+For each schedule a strength alpha is drawn from a power-law (Zipf) distribution with
+exponent `beta`, and each of its activities is mutated with probability alpha / n (capped
+at 0.5). Most children get about one change, while occasional large jumps help escape
+local optima. A mutated activity gets a new room, time, or facilitator, chosen uniformly.
+Returns: a new Population object representing the mutated schedules.
 """
-def mutate(schedule: Schedule, rooms: dict, times: List[str], facilitators: List[str], rate: float) -> Schedule:
-    mutated_items = []
-    for item in schedule.items:
-        if random.random() < rate:
-            mutation_type = random.choice(['room', 'time', 'facilitator'])
-            if mutation_type == 'room':
-                mutated_items.append(ScheduleItem(
-                    activity=item.activity,
-                    room=random.choice(list(rooms.keys())),
-                    time=item.time,
-                    facilitator=item.facilitator
-                ))
-            elif mutation_type == 'time':
-                mutated_items.append(ScheduleItem(
-                    activity=item.activity,
-                    room=item.room,
-                    time=random.choice(times),
-                    facilitator=item.facilitator
-                ))
-            else:  # facilitator
-                mutated_items.append(ScheduleItem(
-                    activity=item.activity,
-                    room=item.room,
-                    time=item.time,
-                    facilitator=random.choice(facilitators)
-                ))
-        else:
-            mutated_items.append(item)
-    return Schedule(mutated_items)
+def mutate(population: Population, rooms: List[Room], times: List[str], facilitators: List[str], beta: float,
+           rng: np.random.Generator) -> Population:
+    shape = population.room_idx.shape
+    rates = np.minimum(rng.zipf(beta, size=shape[0]) / shape[1], 0.5)
+    mask = rng.random(shape) < rates[:, None]
+    mutation_type = rng.integers(0, 3, size=shape)  # 0: room, 1: time, 2: facilitator
+    genes = population.genes.copy()
+    for column, choices, kind in ((ROOM, len(rooms), 0), (TIME, len(times), 1), (FACILITATOR, len(facilitators), 2)):
+        genes[..., column] = np.where(mask & (mutation_type == kind),
+                                      rng.integers(0, choices, size=shape, dtype=np.int8), genes[..., column])
+    return Population(genes)
+
+"""
+Create the next generation in a single compiled kernel: parent selection,
+crossover, heavy-tailed mutation, and fitness evaluation (see mutate).
+Only the random inputs are drawn here, in two vectorized calls, so a seeded
+generator reproduces a run regardless of the number of threads.
+Returns: a new Population object with fitness scores calculated.
+"""
+def next_generation(population: Population, rooms: List[Room], times: List[str], facilitators: List[str],
+                    beta: float, rng: np.random.Generator) -> Population:
+    pop_size, n = population.room_idx.shape
+    alphas = rng.zipf(beta, size=pop_size)
+    uniforms = rng.random((pop_size, 1 + 3 * n))
+    return population.next_generation(alphas, uniforms, len(rooms), len(times), len(facilitators), *FITNESS_TABLES)
 
 """
 Print schedule to console and file
@@ -96,101 +140,92 @@ Print schedule to console and file
 def print_schedule(schedule: Schedule, filename: str = None):
     output_lines = [f"\nFinal Schedule (Fitness Score: {schedule.fitness_score:.2f}):\n"]
     
-    sorted_items = sorted(schedule.items, key=lambda x: (x.time, x.activity))
+    # Map the integer codes back to names, ordered by time slot then activity name
+    items = sorted(
+        zip(schedule.time_idx.tolist(), schedule.activity_idx.tolist(),
+            schedule.room_idx.tolist(), schedule.facilitator_idx.tolist()),
+        key=lambda x: (x[0], ACTIVITIES[x[1]].name)
+    )
     
     current_time = None
-    for item in sorted_items:
-        if item.time != current_time:
-            current_time = item.time
-            output_lines.append(f"\n{current_time}")
+    for time, activity, room, facilitator in items:
+        if time != current_time:
+            current_time = time
+            output_lines.append(f"\n{TIMES[current_time]}")
             output_lines.append("-" * 80)
         output_lines.append(
-            f"Activity: {item.activity:<8} | Room: {item.room:<12} | Facilitator: {item.facilitator}"
+            f"Activity: {ACTIVITIES[activity].name:<8} | Room: {ROOMS[room].name:<12} | Facilitator: {FACILITATORS[facilitator]}"
         )
     
-    print('\n'.join(output_lines))
+    # Build the output text once for both the console and the file
+    text = '\n'.join(output_lines)
+    print(text)
     
     if filename:
         with open(filename, 'w') as f:
-            f.write('\n'.join(output_lines))
+            f.write(text)
 
 """
 Run genetic algorithm for schedule optimization
+Args:
+    population_size: Number of schedules per generation.
+    mutation_beta: Power-law exponent of the mutation strength distribution (must be > 1).
+    seed: Optional seed for a reproducible run.
+
 Returns: The best schedule found by the genetic algorithm
 """
-def run_genetic_algorithm(population_size: int, initial_mutation_rate: float):
-    # Initialize data
-    activities = {
-        "SLA100A": Activity("SLA100A", 50, ["Glen", "Lock", "Banks", "Zeldin"], ["Numen", "Richards"]),
-        "SLA100B": Activity("SLA100B", 50, ["Glen", "Lock", "Banks", "Zeldin"], ["Numen", "Richards"]),
-        "SLA191A": Activity("SLA191A", 50, ["Glen", "Lock", "Banks", "Zeldin"], ["Numen", "Richards"]),
-        "SLA191B": Activity("SLA191B", 50, ["Glen", "Lock", "Banks", "Zeldin"], ["Numen", "Richards"]),
-        "SLA201": Activity("SLA201", 50, ["Glen", "Banks", "Zeldin", "Shaw"], ["Numen", "Richards", "Singer"]),
-        "SLA291": Activity("SLA291", 50, ["Lock", "Banks", "Zeldin", "Singer"], ["Numen", "Richards", "Shaw", "Tyler"]),
-        "SLA303": Activity("SLA303", 60, ["Glen", "Zeldin", "Banks"], ["Numen", "Singer", "Shaw"]),
-        "SLA304": Activity("SLA304", 25, ["Glen", "Banks", "Tyler"], ["Numen", "Singer", "Shaw", "Richards", "Uther", "Zeldin"]),
-        "SLA394": Activity("SLA394", 20, ["Tyler", "Singer"], ["Richards", "Zeldin"]),
-        "SLA449": Activity("SLA449", 60, ["Tyler", "Singer", "Shaw"], ["Zeldin", "Uther"]),
-        "SLA451": Activity("SLA451", 100, ["Tyler", "Singer", "Shaw"], ["Zeldin", "Uther", "Richards", "Banks"])
-    }
-    
-    rooms = {
-        "Slater 003": Room("Slater 003", 45),
-        "Roman 216": Room("Roman 216", 30),
-        "Loft 206": Room("Loft 206", 75),
-        "Roman 201": Room("Roman 201", 50),
-        "Loft 310": Room("Loft 310", 108),
-        "Beach 201": Room("Beach 201", 60),
-        "Beach 301": Room("Beach 301", 75),
-        "Logos 325": Room("Logos 325", 450),
-        "Frank 119": Room("Frank 119", 60)
-    }
-    
-    times = ["10 AM", "11 AM", "12 PM", "1 PM", "2 PM", "3 PM"]
-    facilitators = ["Lock", "Glen", "Banks", "Richards", "Shaw", "Singer", "Uther", "Tyler", "Numen", "Zeldin"]
+def run_genetic_algorithm(population_size: int, mutation_beta: float, seed: Optional[int] = None):
+    # A single NumPy generator supplies every random draw of the run
+    rng = np.random.default_rng(seed)
 
     # Create initial population
-    population = initial_population(activities, rooms, times, facilitators, population_size)
+    population = initial_population(ACTIVITIES, ROOMS, TIMES, FACILITATORS, population_size, rng)
     
-    current_mutation_rate = initial_mutation_rate
+    # Without Numba, fitness evaluation is spread over worker processes.
+    # The pool is created once for the whole run, with the lookup tables sent at startup.
+    pool = None
+    if not HAVE_NUMBA:
+        pool = ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=init_fitness_worker,
+                                   initargs=FITNESS_TABLES)
+
     best_fitness_achieved = float('-inf') # initialize the variable best_fitness_achieved to negative infinity
     generation = 0
-    avg_fitness_history = []
+    # Only the last 100 averages are needed for the convergence check
+    avg_fitness_history = deque(maxlen=100)
     
     while True:
-        # Create new population
-        new_population = []
-        
-        while len(new_population) < population_size:
-            # Select parents and crossover
+        if HAVE_NUMBA:
+            # Breed and score the whole new population in one parallel kernel call
+            new_population = next_generation(population, ROOMS, TIMES, FACILITATORS, mutation_beta, rng)
+        else:
+            # Select parents once per generation; they are the same for every child
             parent1, parent2 = select_parents(population)
-            child = crossover(parent1, parent2)
-            
-            # Mutate and calculate fitness
-            child = mutate(child, rooms, times, facilitators, current_mutation_rate)
-            child.calculate_fitness(activities, rooms)
-            
-            new_population.append(child)
+
+            # Create new population: crossover and mutate all children at once
+            new_population = crossover(parent1, parent2, population_size, rng)
+            new_population = mutate(new_population, ROOMS, TIMES, FACILITATORS, mutation_beta, rng)
+
+            # Calculate fitness of the whole new population across the worker pool
+            new_population.calculate_fitness(*FITNESS_TABLES, pool=pool)
         
         # Replace old population
         population = new_population
         
         # Calculate statistics
-        current_fitness = [p.fitness_score for p in population]
-        current_best_fitness = max(current_fitness)
-        current_avg_fitness = sum(current_fitness) / len(current_fitness)
+        current_best_fitness = float(population.fitness_scores.max())
+        current_avg_fitness = float(population.fitness_scores.mean())
         avg_fitness_history.append(current_avg_fitness)
         
-        # Adapt mutation rate
+        # Report improvements; the heavy-tailed mutation rate needs no adaptation
         if current_best_fitness > best_fitness_achieved:
             best_fitness_achieved = current_best_fitness
-            current_mutation_rate /= 2
-            print(f"Generation {generation}: Reducing mutation rate to {current_mutation_rate}")
+            print(f"Generation {generation}: New best fitness {best_fitness_achieved:.2f}")
         
         # Check convergence after 100 generations
         if generation >= 100:
             # Determine if the genetic algorithm is still making improvement.
-            improvement = (avg_fitness_history[-1] - avg_fitness_history[-100]) / abs(avg_fitness_history[-100])
+            # avg_fitness_history[0] is the average from 99 generations ago
+            improvement = (avg_fitness_history[-1] - avg_fitness_history[0]) / abs(avg_fitness_history[0])
             # If the improvement is less than 1%, the algorithm stops further generations
             if improvement < 0.01:
                 print(f"Converged after {generation} generations")
@@ -199,18 +234,24 @@ def run_genetic_algorithm(population_size: int, initial_mutation_rate: float):
         #  The program prints out progress only every 10th generation
         if generation % 10 == 0:
             print(f"Generation {generation}: Best Fitness = {current_best_fitness:.2f}, "
-                  f"Avg Fitness = {current_avg_fitness:.2f}, "
-                  f"Mutation Rate = {current_mutation_rate:.6f}")
+                  f"Avg Fitness = {current_avg_fitness:.2f}")
         
         generation += 1
+
+    if pool is not None:
+        pool.shutdown()
     
-    return max(population, key=lambda x: x.fitness_score)
+    return population[np.argmax(population.fitness_scores)]
 
 if __name__ == "__main__":
     POPULATION_SIZE = 500
-    INITIAL_MUTATION_RATE = 0.01
+    # Power-law exponent of the mutation strength distribution (must be > 1)
+    MUTATION_BETA = 1.5
+
+    # Compile the fitness kernels once up front; Numba caches the machine code for later runs
+    initial_population(ACTIVITIES, ROOMS, TIMES, FACILITATORS, 1, np.random.default_rng())
     
-    best_schedule = run_genetic_algorithm(POPULATION_SIZE, INITIAL_MUTATION_RATE)
+    best_schedule = run_genetic_algorithm(POPULATION_SIZE, MUTATION_BETA)
     
     # Generate output filenames 
     schedule_file = f"schedule_output.txt"
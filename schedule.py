@@ -1,8 +1,22 @@
-import random
-import math
-from typing import List, Dict, Tuple, Set
+import os
+from concurrent.futures import Executor
+from typing import List, Optional, Tuple
 from dataclasses import dataclass
-from copy import deepcopy
+import numpy as np
+
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    # Without Numba the kernels below run as plain Python; callers can spread
+    # fitness evaluation over worker processes instead (see Population.calculate_fitness).
+    HAVE_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda function: function
 
 
 @dataclass
@@ -17,142 +31,314 @@ class Room:
     name: str
     capacity: int
 
-@dataclass
-class ScheduleItem:
-    activity: str
-    room: str
-    time: str
-    facilitator: str
+# Columns of a genes array: each scheduled activity is one row of four int8 indices,
+# so all of an activity's assignments sit next to each other in memory.
+ACTIVITY, ROOM, TIME, FACILITATOR = range(4)
+
+"""
+Precompute the score terms that depend only on an activity and its room or facilitator.
+Args:
+    room_cap: Capacity of each room.
+    enroll: Expected enrollment of each activity.
+    pref_fac: Boolean table [activity, facilitator], True for preferred facilitators.
+    other_fac: Boolean table [activity, facilitator], True for other acceptable facilitators.
+
+Returns:
+    Tuple[np.ndarray, np.ndarray]: score tables [activity, room] and [activity, facilitator].
+"""
+def static_score_tables(room_cap: np.ndarray, enroll: np.ndarray, pref_fac: np.ndarray,
+                        other_fac: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    capacity = room_cap[None, :].astype(np.int64)
+    enrollment = enroll[:, None].astype(np.int64)
+    # Room size checks. Penalize if the room is too small for the expected enrollment,
+    # or if its capacity is significantly larger than required.
+    score_ar = np.select(
+        [capacity < enrollment, capacity > 6 * enrollment, capacity > 3 * enrollment],
+        [-0.5, -0.4, -0.2],
+        default=0.3
+    )
+    # Reward if the activity is overseen by a preferred facilitator. otherwise, giving penalty.
+    score_af = np.where(pref_fac, 0.5, np.where(other_fac, 0.2, -0.1))
+    return score_ar, score_af
+
+"""
+Calculate the fitness score of a schedule based on various constraints.
+Compiled to native code with Numba; the schedule is passed as its genes array.
+Args:
+    genes: int8 array [activity, 4] with the ACTIVITY, ROOM, TIME and FACILITATOR indices of each scheduled activity.
+    score_ar: Room size score of each [activity, room] pair (see static_score_tables).
+    score_af: Facilitator preference score of each [activity, facilitator] pair.
+    sla101_mask: Boolean per activity, True for the SLA101 sections (SLA100A/B).
+    sla191_mask: Boolean per activity, True for the SLA191 sections.
+    roman_or_beach: Boolean per room, True for rooms in the Roman or Beach buildings.
+    load_exempt: Boolean per facilitator, True if exempt from the minimum load penalty (Tyler).
+"""
+@njit(cache=True)
+def _fitness(genes, score_ar, score_af, sla101_mask, sla191_mask, roman_or_beach, load_exempt):
+    n = genes.shape[0]
+    n_rooms = score_ar.shape[1]
+    n_facilitators = score_af.shape[1]
+    n_times = 0
+    for i in range(n):
+        n_times = max(n_times, np.int64(genes[i, TIME]) + 1)
+
+    score = 0.0
+    room_time_counts = np.zeros((n_rooms, n_times), np.int32)
+    facilitator_time_counts = np.zeros((n_facilitators, n_times), np.int32)
+    facilitator_counts = np.zeros(n_facilitators, np.int32)
+
+    # Indices of the SLA101 and SLA191 sections
+    sla101 = np.empty(n, np.int64)
+    sla191 = np.empty(n, np.int64)
+    n_sla101 = 0
+    n_sla191 = 0
+
+    for i in range(n):
+        activity, room, time, facilitator = genes[i, ACTIVITY], genes[i, ROOM], genes[i, TIME], genes[i, FACILITATOR]
+
+        # Room time conflicts. Penalize if multiple activities are scheduled in the same room at the same time.
+        if room_time_counts[room, time] > 0:
+            score -= 0.5
+        room_time_counts[room, time] += 1
+
+        # Track the number of activities each facilitator is assigned overall and at each time slot.
+        facilitator_counts[facilitator] += 1
+        facilitator_time_counts[facilitator, time] += 1
+
+        if sla101_mask[activity]:
+            sla101[n_sla101] = i
+            n_sla101 += 1
+        elif sla191_mask[activity]:
+            sla191[n_sla191] = i
+            n_sla191 += 1
+
+    # Process each scheduled item
+    for i in range(n):
+        activity, room, time, facilitator = genes[i, ACTIVITY], genes[i, ROOM], genes[i, TIME], genes[i, FACILITATOR]
+
+        # Room size and facilitator preference checks, precomputed per pair
+        score += score_ar[activity, room] + score_af[activity, facilitator]
+
+        # Facilitator load checks
+        # Reward for only one activity at the given time slot. otherwise, giving penalty
+        if facilitator_time_counts[facilitator, time] == 1:
+            score += 0.2
+        else:
+            score -= 0.2
+
+        # Penalize if the facilitator is assigned more than 4
+        if facilitator_counts[facilitator] > 4:
+            score -= 0.5
+        # Penalize if the facilitator has fewer than 3 activities (except for Tyler)
+        elif facilitator_counts[facilitator] < 3 and not load_exempt[facilitator]:
+            score -= 0.4
+
+    # SLA101 sections timing
+    if n_sla101 == 2:
+        time_diff = abs(np.int64(genes[sla101[0], TIME]) - np.int64(genes[sla101[1], TIME]))
+        if time_diff == 0:
+            score -= 0.5
+        elif time_diff > 4:
+            score += 0.5
+
+    # SLA191 sections timing
+    if n_sla191 == 2:
+        time_diff = abs(np.int64(genes[sla191[0], TIME]) - np.int64(genes[sla191[1], TIME]))
+        if time_diff == 0:
+            score -= 0.5
+        elif time_diff > 4:
+            score += 0.5
+
+    # Consecutive sections checks
+    # Reward if SLA101 and SLA191 sections are consecutive or 2 hours apart, and penalize if they are at the same time.
+    for a in range(n_sla101):
+        for b in range(n_sla191):
+            i = sla101[a]
+            j = sla191[b]
+            time_diff = abs(np.int64(genes[i, TIME]) - np.int64(genes[j, TIME]))
+            if time_diff == 1:
+                score += 0.5
+                # Penalize if only one of the consecutive sections is in a Roman or Beach room
+                if roman_or_beach[genes[i, ROOM]] != roman_or_beach[genes[j, ROOM]]:
+                    score -= 0.4
+            elif time_diff == 2:
+                score += 0.25
+            elif time_diff == 0:
+                score -= 0.25
+
+    return score
 
 """
 A complete schedule with multiple scheduled items 
 and methods for fitness evaluation.
 """
 class Schedule:
-    # Initialize the schedule with a list of ScheduleItems.
-    def __init__(self, items: List[ScheduleItem]):
-        self.items = items
+    # Initialize the schedule with its genes: one row of indices per activity (see ACTIVITY, ROOM, TIME, FACILITATOR).
+    def __init__(self, genes: np.ndarray):
+        self.genes = genes
         self.fitness_score = None
 
-    def __lt__(self, other):
-        # For heap operations, comparing by fitness score
-        return self.fitness_score < other.fitness_score
-
-    # Calculate the fitness score of the schedule based on various constraints.
-    def calculate_fitness(self, activities: Dict[str, Activity], rooms: Dict[str, Room]) -> float:
-        score = 0
-        facilitator_counts = {}
-        time_room_pairs = set()
-        facilitator_time_counts = {}
-        
-        # Track time slots for SLA101 and SLA191 sections
-        sla101_times = []
-        sla191_times = []
-        
-        # Initialize facilitator counts
-        for item in self.items:
-            if item.facilitator not in facilitator_counts:
-                facilitator_counts[item.facilitator] = 0
-            facilitator_counts[item.facilitator] += 1
-            
-            time_key = f"{item.facilitator}_{item.time}"
-
-            # Track the number of activities each facilitator is assigned at the same time slot.
-            if time_key not in facilitator_time_counts:
-                facilitator_time_counts[time_key] = 0
-            facilitator_time_counts[time_key] += 1
-
-            if item.activity in ["SLA100A", "SLA100B"]:
-                sla101_times.append(item.time)
-            elif item.activity in ["SLA191A", "SLA191B"]:
-                sla191_times.append(item.time)
-
-        # Process each scheduled item
-        for item in self.items:
-            # Room time conflicts. Penalize if multiple activities are scheduled in the same room at the same time.
-            time_room_pair = (item.time, item.room)
-            if time_room_pair in time_room_pairs:
-                score -= 0.5
-            time_room_pairs.add(time_room_pair)
-            
-            # Room size checks
-            activity = activities[item.activity]
-            room = rooms[item.room]
-
-            # Penalize if the assigned room is too small for the expected enrollment.
-            if room.capacity < activity.enrollment:
-                score -= 0.5
-            # Penalize if the room capacity is significantly larger than required    
-            elif room.capacity > 6 * activity.enrollment:
-                score -= 0.4
-            elif room.capacity > 3 * activity.enrollment:
-                score -= 0.2
-            else:
-                score += 0.3
-                
-            # Reward if the activity is overseen by a preferred facilitator. otherwise, giving penalty.
-            if item.facilitator in activity.preferred_facilitators:
-                score += 0.5
-            elif item.facilitator in activity.other_facilitators:
-                score += 0.2
-            else:
-                score -= 0.1
-                
-            # Facilitator load checks
-            time_key = f"{item.facilitator}_{item.time}"
-            # Reward for only one activity at the given time slot. otherwise, giving penalty
-            if facilitator_time_counts[time_key] == 1:
-                score += 0.2
-            elif facilitator_time_counts[time_key] > 1:
-                score -= 0.2
-
-            # Penalize if the facilitator is assigned more than 4    
-            if facilitator_counts[item.facilitator] > 4:
-                score -= 0.5
-            # Penalize if the facilitator has fewer than 3 activities (except for Tyler)
-            elif facilitator_counts[item.facilitator] < 3 and item.facilitator != "Tyler":
-                score -= 0.4
-
-        # Time slot specific times
-        time_slots = ["10 AM", "11 AM", "12 PM", "1 PM", "2 PM", "3 PM"]
-        
-        # SLA101 sections timing
-        if len(sla101_times) == 2:
-            if sla101_times[0] == sla101_times[1]:
-                score -= 0.5
-            elif abs(time_slots.index(sla101_times[0]) - time_slots.index(sla101_times[1])) > 4:
-                score += 0.5
-                
-        # SLA191 sections timing
-        if len(sla191_times) == 2:
-            if sla191_times[0] == sla191_times[1]:
-                score -= 0.5
-            elif abs(time_slots.index(sla191_times[0]) - time_slots.index(sla191_times[1])) > 4:
-                score += 0.5
+    def __len__(self) -> int:
+        return len(self.genes)
+
+    @property
+    def activity_idx(self) -> np.ndarray:
+        return self.genes[:, ACTIVITY]
+
+    @property
+    def room_idx(self) -> np.ndarray:
+        return self.genes[:, ROOM]
+
+    @property
+    def time_idx(self) -> np.ndarray:
+        return self.genes[:, TIME]
+
+    @property
+    def facilitator_idx(self) -> np.ndarray:
+        return self.genes[:, FACILITATOR]
+
+    # Calculate the fitness score of the schedule using the lookup tables (see _fitness).
+    def calculate_fitness(self, score_ar: np.ndarray, score_af: np.ndarray, sla101_mask: np.ndarray,
+                          sla191_mask: np.ndarray, roman_or_beach: np.ndarray, load_exempt: np.ndarray) -> float:
+        self.fitness_score = _fitness(self.genes, score_ar, score_af, sla101_mask, sla191_mask,
+                                      roman_or_beach, load_exempt)
+        return self.fitness_score
+
+
+"""
+Evaluate the fitness of every schedule in a population in one parallel kernel.
+pop_genes[i] is the genes array of schedule i; schedules are scored independently across threads.
+"""
+@njit(parallel=True, cache=True)
+def _batch_fitness(pop_genes, score_ar, score_af, sla101_mask, sla191_mask, roman_or_beach, load_exempt):
+    scores = np.empty(pop_genes.shape[0])
+    for i in prange(pop_genes.shape[0]):
+        scores[i] = _fitness(pop_genes[i], score_ar, score_af, sla101_mask, sla191_mask, roman_or_beach, load_exempt)
+    return scores
+
+"""
+Breed and score a full generation in one parallel kernel.
+The two best schedules of the current population are the parents of every child.
+Child i takes the activities before its crossover point from the best parent and the
+rest from the second best, then each activity is mutated with probability
+min(alphas[i] / n, 0.5) to a new room, time or facilitator, and the child is scored.
+All randomness comes from the caller: uniforms[i] holds 1 + 3 * n values in [0, 1)
+for child i (crossover point, then per activity: mutate?, what to mutate, new value),
+so results do not depend on how children are spread over threads.
+"""
+@njit(parallel=True, cache=True)
+def _next_generation(pop_genes, scores, alphas, uniforms, n_rooms, n_times, n_facilitators,
+                     score_ar, score_af, sla101_mask, sla191_mask, roman_or_beach, load_exempt):
+    pop_size, n, _ = pop_genes.shape
+
+    # Select the two best schedules as parents
+    best = 0
+    for i in range(pop_size):
+        if scores[i] > scores[best]:
+            best = i
+    second = 1 if best == 0 else 0
+    for i in range(pop_size):
+        if i != best and scores[i] > scores[second]:
+            second = i
+
+    new_genes = np.empty_like(pop_genes)
+    new_scores = np.empty(pop_size)
+    for i in prange(pop_size):
+        u = uniforms[i]
+        crossover_point = min(int(u[0] * (n + 1)), n)
+        rate = min(alphas[i] / n, 0.5)
+        for j in range(n):
+            # Crossover: copy the activity's whole row from one parent
+            parent = best if j < crossover_point else second
+            new_genes[i, j, :] = pop_genes[parent, j, :]
+
+            # Mutate: a new room, time or facilitator, chosen uniformly
+            if u[1 + j] < rate:
+                mutation_type = min(int(u[1 + n + j] * 3), 2)
+                value = u[1 + 2 * n + j]
+                if mutation_type == 0:
+                    new_genes[i, j, ROOM] = min(int(value * n_rooms), n_rooms - 1)
+                elif mutation_type == 1:
+                    new_genes[i, j, TIME] = min(int(value * n_times), n_times - 1)
+                else:
+                    new_genes[i, j, FACILITATOR] = min(int(value * n_facilitators), n_facilitators - 1)
+
+        new_scores[i] = _fitness(new_genes[i], score_ar, score_af, sla101_mask, sla191_mask,
+                                 roman_or_beach, load_exempt)
+    return new_genes, new_scores
+
+"""
+A population of schedules stored as one int8 genes array [schedule, activity, 4].
+genes[i] is the genes array of schedule i; fitness_scores holds the score of each schedule.
+The whole population is contiguous, e.g. 500 schedules of 11 activities take 22 KB.
+"""
+class Population:
+    # Initialize the population with its genes array.
+    def __init__(self, genes: np.ndarray):
+        self.genes = genes
+        self.fitness_scores = None
+
+    def __len__(self) -> int:
+        return len(self.genes)
+
+    @property
+    def activity_idx(self) -> np.ndarray:
+        return self.genes[..., ACTIVITY]
+
+    @property
+    def room_idx(self) -> np.ndarray:
+        return self.genes[..., ROOM]
+
+    @property
+    def time_idx(self) -> np.ndarray:
+        return self.genes[..., TIME]
+
+    @property
+    def facilitator_idx(self) -> np.ndarray:
+        return self.genes[..., FACILITATOR]
+
+    # Return schedule i (sharing the population's memory) together with its fitness score.
+    def __getitem__(self, i: int) -> Schedule:
+        schedule = Schedule(self.genes[i])
+        if self.fitness_scores is not None:
+            schedule.fitness_score = float(self.fitness_scores[i])
+        return schedule
+
+    # Calculate the fitness score of every schedule in one parallel kernel call.
+    # Takes the same lookup tables as Schedule.calculate_fitness. If a pool started with
+    # init_fitness_worker is given, chunks of rows are scored in its worker processes instead.
+    def calculate_fitness(self, *tables: np.ndarray, pool: Optional[Executor] = None) -> np.ndarray:
+        if pool is None:
+            self.fitness_scores = _batch_fitness(self.genes, *tables)
+        else:
+            # Only the int8 genes are sent; the workers already hold the tables
+            n_chunks = min(len(self), 4 * (os.cpu_count() or 1))
+            chunks = np.array_split(self.genes, n_chunks)
+            self.fitness_scores = np.concatenate(list(pool.map(_score_chunk, chunks)))
+        return self.fitness_scores
+
+    # Breed the next generation and calculate its fitness in a single kernel call (see _next_generation).
+    # Requires fitness scores of this population; takes the same lookup tables as calculate_fitness.
+    def next_generation(self, alphas: np.ndarray, uniforms: np.ndarray, n_rooms: int, n_times: int,
+                        n_facilitators: int, *tables: np.ndarray) -> "Population":
+        genes, scores = _next_generation(self.genes, self.fitness_scores, alphas, uniforms,
+                                         n_rooms, n_times, n_facilitators, *tables)
+        population = Population(genes)
+        population.fitness_scores = scores
+        return population
+
+
+# Lookup tables of a fitness worker process, set once by init_fitness_worker.
+_worker_tables = ()
+
+"""
+Initializer for processes of a fitness evaluation pool.
+Stores the lookup tables so they are sent to each worker once, not with every chunk.
+"""
+def init_fitness_worker(*tables: np.ndarray):
+    global _worker_tables
+    _worker_tables = tables
 
-        """
-        Consecutive sections checks
-        Iterate over all times for SLA101 sections and SLA191 sections to evaluate their relative timing.
-        Reward if these sections in consecutive or 2 hours apart, and to penalize if they are scheduled at same time.
-        
-        """
-        for sla101_time in sla101_times:
-            for sla191_time in sla191_times:
-                time_diff = abs(time_slots.index(sla101_time) - time_slots.index(sla191_time))
-                if time_diff == 1:
-                    score += 0.5
-                    sla101_item = next(item for item in self.items if item.activity in ["SLA100A", "SLA100B"] and item.time == sla101_time)
-                    sla191_item = next(item for item in self.items if item.activity in ["SLA191A", "SLA191B"] and item.time == sla191_time)
-                    
-                    is_sla101_in_roman_beach = "Roman" in sla101_item.room or "Beach" in sla101_item.room
-                    is_sla191_in_roman_beach = "Roman" in sla191_item.room or "Beach" in sla191_item.room
-                    
-                    if is_sla101_in_roman_beach != is_sla191_in_roman_beach:
-                        score -= 0.4
-                elif time_diff == 2:
-                    score += 0.25
-                elif time_diff == 0:
-                    score -= 0.25
-
-        self.fitness_score = score
-        return score
\ No newline at end of file
+# Score one chunk of population genes in a worker process.
+def _score_chunk(chunk: np.ndarray) -> np.ndarray:
+    return _batch_fitness(chunk, *_worker_tables)